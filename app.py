@@ -9,12 +9,16 @@ client = Client(api_key, secret_key)
 # Must be first Streamlit command
 st.set_page_config(layout="wide")
 
+import numpy as np
 import pandas as pd
-import requests
 import time
 from datetime import datetime, timedelta
 import pytz
 from streamlit_autorefresh import st_autorefresh
+from binance_client import (
+    VOLUME, QUOTE_ASSET_VOLUME,
+    MAX_AVG_DAYS, load_usdt_perpetuals, get_inr_rate, fetch_avg_volumes, fetch_last_klines
+)
 
 # Auto-refresh every 60 seconds
 st_autorefresh(interval=60000, key="refresh")
@@ -27,7 +31,7 @@ with st.expander("🔧 Filter Settings", expanded=True):
     with col1:
         inr_threshold = st.number_input("Min 1-min trade value (INR)", value=4_00_00_000, step=10_00_000)
     with col2:
-        volume_days = st.number_input("Days for volume avg", min_value=1, value=5)
+        volume_days = st.number_input("Days for volume avg", min_value=1, max_value=MAX_AVG_DAYS, value=5)
     with col3:
         volume_multiplier = st.number_input("Volume multiplier", min_value=1.0, value=10.0)
 
@@ -40,80 +44,63 @@ if "previous_minute_data" not in st.session_state:
 
 def fetch_symbols():
     try:
-        url = "https://fapi.binance.com/fapi/v1/exchangeInfo"
-        data = requests.get(url).json()
-        return [s['symbol'] for s in data['symbols'] if s['contractType'] == 'PERPETUAL' and s['symbol'].endswith('USDT')]
+        symbols, _ = load_usdt_perpetuals()
+        return symbols
     except:
         return []
 
-def fetch_1m_klines(symbol):
-    url = f"https://fapi.binance.com/fapi/v1/klines?symbol={symbol}&interval=1m&limit={volume_days * 1440}"
-    try:
-        data = requests.get(url).json()
-        return pd.DataFrame(data, columns=[
-            "open_time", "open", "high", "low", "close", "volume",
-            "close_time", "quote_asset_volume", "num_trades",
-            "taker_buy_base_volume", "taker_buy_quote_volume", "ignore"
-        ])
-    except:
-        return pd.DataFrame()
-
 symbols = fetch_symbols()
+avg_volumes = fetch_avg_volumes(tuple(symbols), volume_days)
+klines = fetch_last_klines(symbols)
 
 now_utc = datetime.utcnow()
 now_ist = now_utc + timedelta(hours=5, minutes=30)
 timestamp = now_ist.strftime('%Y-%m-%d %H:%M:%S')
 
-value_results = []
-volume_results = []
-
-for symbol in symbols:
-    df = fetch_1m_klines(symbol)
-    if df.empty or len(df) < volume_days * 1440:
-        continue
-
-    df["volume"] = pd.to_numeric(df["volume"], errors='coerce')
-    df["quote_asset_volume"] = pd.to_numeric(df["quote_asset_volume"], errors='coerce')
-
-    last_volume = df.iloc[-1]["volume"]
-    avg_volume = df["volume"][:-1].tail(volume_days * 1440).mean()
-
-    last_value_in_usdt = df.iloc[-1]["quote_asset_volume"]
-    inr_rate = 83  # approx
-    last_value_in_inr = last_value_in_usdt * inr_rate
-
-    if last_value_in_inr > inr_threshold:
-        value_results.append({
-            "Symbol": symbol,
-            "1m Value (INR)": f"{last_value_in_inr:,.0f}",
-            "Timestamp": timestamp
-        })
-
-    if last_volume > volume_multiplier * avg_volume:
-        volume_results.append({
-            "Symbol": symbol,
-            "1m Vol": f"{last_volume:,.2f}",
-            "Avg Vol": f"{avg_volume:,.2f}",
-            "x Avg": f"{last_volume / avg_volume:.1f}x",
-            "Timestamp": timestamp
-        })
+inr_rate = get_inr_rate()
+
+# One row per symbol, screened with vectorized masks instead of per-symbol checks
+closed = [(symbol, row) for symbol, row in zip(symbols, klines) if row is not None]
+rows = np.array([row for _, row in closed], dtype=object).reshape(-1, 12)
+screen_df = pd.DataFrame({
+    "symbol": [symbol for symbol, _ in closed],
+    "vol": rows[:, VOLUME].astype(np.float64),
+    "val": rows[:, QUOTE_ASSET_VOLUME].astype(np.float64) * inr_rate
+})
+# The hourly-cached historical mean is already O(1) per refresh and stays current
+screen_df["avg"] = screen_df["symbol"].map(avg_volumes)
+
+value_hits = screen_df[screen_df["val"] > inr_threshold]
+volume_hits = screen_df[(screen_df["avg"] > 0) & (screen_df["vol"] > volume_multiplier * screen_df["avg"])]
+
+df_val = pd.DataFrame({
+    "Symbol": value_hits["symbol"],
+    "1m Value (INR)": value_hits["val"].map("{:,.0f}".format),
+    "Timestamp": timestamp
+}).reset_index(drop=True)
+
+df_vol = pd.DataFrame({
+    "Symbol": volume_hits["symbol"],
+    "1m Vol": volume_hits["vol"].map("{:,.2f}".format),
+    "Avg Vol": volume_hits["avg"].map("{:,.2f}".format),
+    "x Avg": (volume_hits["vol"] / volume_hits["avg"]).map("{:.1f}x".format),
+    "Timestamp": timestamp
+}).reset_index(drop=True)
 
 # Save current minute data as previous for next refresh
 st.session_state.previous_minute_data = {
-    "value": value_results.copy(),
-    "volume": volume_results.copy()
+    "value": df_val.to_dict("records"),
+    "volume": df_vol.to_dict("records")
 }
 
 st.subheader("📊 Value Condition (1-min Trade Value > ₹{:,})".format(inr_threshold))
-if value_results:
-    df_val = pd.DataFrame(value_results)
+if not df_val.empty:
     st.dataframe(df_val, use_container_width=True)
 else:
     st.info("No symbols met the value condition this minute.")
 
 st.subheader("📊 Volume Condition (1-min Vol > {}x {}-day Avg)".format(volume_multiplier, volume_days))
-if volume_results:
-    df_vol = pd.DataFrame(volume_results)
+if not df_vol.empty:
     st.dataframe(df_vol, use_container_width=True)
 else:
     st.info("No symbols met the volume condition this minute.")
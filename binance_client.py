@@ -0,0 +1,123 @@
+# Binance Futures REST helpers shared by the screener apps, so they reuse one
+# HTTP session and one set of st.cache_data entries
+import streamlit as st
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import time
+import aiohttp
+import orjson
+
+# Global constants
+BINANCE_WS_URL = "wss://fstream.binance.com/stream?streams="
+BINANCE_API_URL = "https://fapi.binance.com"
+SYMBOLS_ENDPOINT = "/fapi/v1/exchangeInfo"
+KLINES_ENDPOINT = "/fapi/v1/klines"
+INR_CONVERSION_API = "https://api.exchangerate.host/latest?base=USD&symbols=INR"
+INR_FALLBACK_RATE = 83.0
+# Klines weigh 2 up to limit 499 (5 from 500, 10 above 1000); at 20 days the hourly
+# average request is 481 rows, so a full ~400-symbol sweep stays near 800 of the
+# 2,400/minute IP weight budget, leaving room for the per-minute 1m kline sweep
+MAX_AVG_DAYS = 20
+AVG_VOLUME_TTL = 3600  # seconds a fetched average is reused
+AVG_VOLUME_RETRY = 300  # seconds before a symbol whose fetch failed is retried
+
+# Kline row layout: open_time, open, high, low, close, volume, close_time, quote_asset_volume, ...
+OPEN_TIME, VOLUME, QUOTE_ASSET_VOLUME = 0, 5, 7
+
+# Imported once per process, so the pooled connections survive script reruns
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=Retry(total=3, backoff_factor=0.3)))
+SESSION.headers.update({"User-Agent": "Mozilla/5.0", "Connection": "keep-alive"})
+
+# The symbol universe rarely changes; failures raise so an empty list is never cached
+@st.cache_data(ttl=3600)
+def load_usdt_perpetuals():
+    res = orjson.loads(SESSION.get(BINANCE_API_URL + SYMBOLS_ENDPOINT).content)
+    if "symbols" not in res:
+        raise RuntimeError(f"API error {res.get('code')}: {res.get('msg')}")
+    symbols = [s["symbol"] for s in res["symbols"] if s["contractType"] == "PERPETUAL" and s["symbol"].endswith("USDT")]
+    # Trade stream names are derived once here rather than on every websocket connect
+    trade_streams = [f"{s.lower()}@trade" for s in symbols]
+    return symbols, trade_streams
+
+# Failures raise so the fallback rate is never cached for the full hour. Called with a
+# bare requests.get rather than SESSION so the adapter's retries don't stack on the timeout
+@st.cache_data(ttl=3600)
+def load_inr_rate():
+    res = orjson.loads(requests.get(INR_CONVERSION_API, timeout=2).content)
+    return float(res["rates"]["INR"])
+
+# The short outer cache also holds the fallback, so an outage costs one timeout per 5 minutes
+@st.cache_data(ttl=300)
+def get_inr_rate():
+    try:
+        return load_inr_rate()
+    except Exception:
+        return INR_FALLBACK_RATE
+
+async def fetch_json(session, url, params=None):
+    async with session.get(url, params=params) as res:
+        return orjson.loads(await res.read())
+
+async def fetch_klines(session, symbol, interval, limit):
+    # None marks a failed fetch (error payload, 429, timeout) so callers can tell it from no data
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    try:
+        data = await fetch_json(session, BINANCE_API_URL + KLINES_ENDPOINT, params=params)
+        if isinstance(data, dict):  # error payload
+            return None
+        return np.array(data, dtype=object)
+    except Exception:
+        return None
+
+async def fetch_all_klines(symbols, interval, limit):
+    # Connector limit only bounds concurrency; callers keep request weight in budget (see MAX_AVG_DAYS)
+    connector = aiohttp.TCPConnector(limit=50)
+    # Bound each request (pool wait included) well inside the 60 s refresh; fetch_klines
+    # turns a timeout into None like any other failure
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        return await asyncio.gather(*(fetch_klines(session, symbol, interval, limit) for symbol in symbols))
+
+# Per-symbol averages shared by every session: (symbol, days) -> (ok, avg, fetched_at)
+@st.cache_resource
+def avg_volume_store():
+    return {}
+
+def fetch_avg_volumes(symbols, days):
+    # The historical mean barely moves minute to minute, so each symbol is refetched hourly;
+    # failed fetches are retried on their own after AVG_VOLUME_RETRY instead of resweeping
+    # every symbol, so a burst of 429s cannot turn the hourly sweep into a per-minute one
+    store = avg_volume_store()
+    now = time.time()
+    stale = []
+    for symbol in symbols:
+        entry = store.get((symbol, days))
+        if entry is None or now - entry[2] > (AVG_VOLUME_TTL if entry[0] else AVG_VOLUME_RETRY):
+            stale.append(symbol)
+
+    if stale:
+        # Hourly bars cover the window in one small call; the extra bar is the hour still forming
+        for symbol, data in zip(stale, asyncio.run(fetch_all_klines(stale, "1h", days * 24 + 1))):
+            if data is None:
+                store[(symbol, days)] = (False, None, now)
+            elif len(data) >= 2:
+                store[(symbol, days)] = (True, data[:-1, VOLUME].astype(np.float64).sum() / ((len(data) - 1) * 60), now)
+            else:
+                store[(symbol, days)] = (True, None, now)
+
+    avg_volumes = {}
+    for symbol in symbols:
+        ok, avg, _ = store[(symbol, days)]
+        if ok and avg is not None:
+            avg_volumes[symbol] = avg
+    return avg_volumes
+
+def fetch_last_klines(symbols):
+    # ticker/24hr only carries rolling 24h totals, so there is no single call for
+    # per-minute volume; take the last two bars per symbol and keep the closed one
+    klines = asyncio.run(fetch_all_klines(symbols, "1m", 2))
+    return [data[0] if data is not None and len(data) == 2 else None for data in klines]
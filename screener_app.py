@@ -1,88 +1,44 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import asyncio
 import websockets
-import json
-import requests
+import orjson
 from datetime import datetime, timedelta
-import time
+from binance_client import BINANCE_WS_URL, load_usdt_perpetuals, get_inr_rate, fetch_avg_volumes
 
 # Global constants
-BINANCE_WS_URL = "wss://fstream.binance.com/stream?streams="
-BINANCE_API_URL = "https://fapi.binance.com"
-SYMBOLS_ENDPOINT = "/fapi/v1/exchangeInfo"
-KLINES_ENDPOINT = "/fapi/v1/klines"
-INR_CONVERSION_API = "https://api.exchangerate.host/latest?base=USD&symbols=INR"
+HISTORY_MINUTES = 120  # minutes of history kept per session
+TRADE_BATCH_SIZE = 256  # max trades drained from the queue per pass
 
 # Helper functions
-def get_inr_rate():
-    try:
-        res = requests.get(INR_CONVERSION_API).json()
-        return res["rates"]["INR"]
-    except:
-        return 82  # fallback
-
 def fetch_perpetual_futures_symbols():
     try:
-        res = requests.get(BINANCE_API_URL + SYMBOLS_ENDPOINT).json()
-        if "symbols" not in res:
-            st.error(f"API error {res.get('code')}: {res.get('msg')}")
-            return []
-        symbols = [s["symbol"] for s in res["symbols"] if s["contractType"] == "PERPETUAL"]
-        return symbols
+        return load_usdt_perpetuals()
+    except RuntimeError as e:
+        st.error(str(e))
+        return [], []
     except Exception as e:
         st.error(f"Exception fetching symbols: {e}")
-        return []
-
-
-
-def fetch_5day_1min_avg_vol(symbol, days=5):
-    try:
-        end_time = int(time.time() * 1000)
-        start_time = end_time - days * 24 * 60 * 60 * 1000
-        params = {
-            "symbol": symbol,
-            "interval": "1m",
-            "startTime": start_time,
-            "endTime": end_time,
-            "limit": 1000
-        }
-        res = requests.get(BINANCE_API_URL + KLINES_ENDPOINT, params=params).json()
-        if isinstance(res, dict) and "code" in res:
-            return None
-        volumes = [float(k[5]) for k in res]  # volume is 6th item
-        avg_vol = sum(volumes) / len(volumes) if volumes else 0
-        return avg_vol
-    except Exception as e:
-        return None
+        return [], []
 
-async def listen_binance_ws(symbols, queue):
-    streams = "/".join([f"{s.lower()}@trade" for s in symbols])
-    url = BINANCE_WS_URL + streams
+async def listen_binance_ws(trade_streams, queue):
+    url = BINANCE_WS_URL + "/".join(trade_streams)
     async with websockets.connect(url) as ws:
-        while True:
-            try:
-                msg = await ws.recv()
-                data = json.loads(msg)
-                await queue.put(data)
-            except Exception as e:
-                st.error(f"WebSocket error: {e}")
-                break
-
-def process_trade_data(trade, inr_rate):
-    symbol = trade['s']
-    qty = float(trade['q'])
-    price = float(trade['p'])
-    volume = qty
-    value_in_usd = qty * price
-    value_in_inr = value_in_usd * inr_rate
-    timestamp = datetime.fromtimestamp(trade['T'] / 1000)
-    return {
-        "symbol": symbol,
-        "volume": volume,
-        "value_in_inr": value_in_inr,
-        "timestamp": timestamp,
-    }
+        try:
+            async for msg in ws:
+                # Reject non-trade frames before paying for a parse
+                if '"e":"trade"' not in msg:
+                    continue
+                await queue.put(orjson.loads(msg)["data"])
+        except Exception as e:
+            st.error(f"WebSocket error: {e}")
+
+def process_trade_batch(trades, inr_rate):
+    # Numeric core for a whole batch of trades at once: per-trade volume and INR value
+    qty = np.array([trade['q'] for trade in trades], dtype=np.float64)
+    price = np.array([trade['p'] for trade in trades], dtype=np.float64)
+    return qty, qty * price * inr_rate
 
 # Streamlit UI and logic
 
@@ -115,8 +71,9 @@ page_num_history = st.session_state.get("page_num_history", 1)
 if "filtered_current" not in st.session_state:
     st.session_state.filtered_current = pd.DataFrame(columns=["symbol", "volume", "value_in_inr", "timestamp"])
 
-if "filtered_history" not in st.session_state:
-    st.session_state.filtered_history = pd.DataFrame(columns=["symbol", "volume", "value_in_inr", "timestamp"])
+# One DataFrame per past minute, concatenated only when rendered
+if "history_chunks" not in st.session_state:
+    st.session_state.history_chunks = []
 
 if "page_num_current" not in st.session_state:
     st.session_state.page_num_current = 1
@@ -142,8 +99,13 @@ def prev_page_current():
     if st.session_state.page_num_current > 1:
         st.session_state.page_num_current -= 1
 
+def build_history():
+    if not st.session_state.history_chunks:
+        return pd.DataFrame(columns=["symbol", "volume", "value_in_inr", "timestamp"])
+    return pd.concat(st.session_state.history_chunks, copy=False).sort_values(by="timestamp", ascending=False, ignore_index=True)
+
 def next_page_history():
-    if (st.session_state.page_num_history * page_size) < len(st.session_state.filtered_history):
+    if (st.session_state.page_num_history * page_size) < sum(len(chunk) for chunk in st.session_state.history_chunks):
         st.session_state.page_num_history += 1
 
 def prev_page_history():
@@ -169,7 +131,7 @@ with col4:
 if st.button("▶️ Start Screener"):
 
     inr_rate = get_inr_rate()
-    symbols = fetch_perpetual_futures_symbols()
+    symbols, trade_streams = fetch_perpetual_futures_symbols()
 
     if not symbols:
         st.warning("No symbols found, please try again later.")
@@ -178,96 +140,87 @@ if st.button("▶️ Start Screener"):
 
         # For simplicity, limit number of symbols to 50 to reduce load (you can increase)
         symbols = symbols[:50]
+        trade_streams = trade_streams[:50]
 
         avg_vol_dict = {}
         if condition == "Volume-based":
             with st.spinner("Fetching 5-day average volumes..."):
-                for sym in symbols:
-                    avg_vol = fetch_5day_1min_avg_vol(sym, int(days))
-                    if avg_vol is not None:
-                        avg_vol_dict[sym] = avg_vol
-                    else:
-                        avg_vol_dict[sym] = 0
+                avg_vol_dict = fetch_avg_volumes(tuple(symbols), int(days))
 
         st.info("Listening to real-time trades. Please wait for updates...")
 
-        # Prepare to run async websocket listener
-        import threading
-        import queue
-
-        q = queue.Queue()
-
-        async def run_ws():
-            await listen_binance_ws(symbols, q)
-
-        def start_loop(loop):
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(run_ws())
-
-        loop = asyncio.new_event_loop()
-        t = threading.Thread(target=start_loop, args=(loop,), daemon=True)
-        t.start()
-
-        # Process incoming trade messages for 1 minute intervals
-        df_current_min = pd.DataFrame(columns=["symbol", "volume", "value_in_inr", "timestamp"])
-
-        start_time = datetime.utcnow()
-        last_minute = start_time.minute
-
-        while True:
-            try:
-                while not q.empty():
-                    msg = q.get_nowait()
-                    data = msg.get("data", {})
-                    if data.get("e") == "trade":
-                        trade = data
-                        trade_info = process_trade_data(trade, inr_rate)
-
-                        # Filtering logic
-                        sym = trade_info["symbol"]
-                        vol = trade_info["volume"]
-                        val = trade_info["value_in_inr"]
-
-                        passes_filter = False
-                        if condition == "Volume-based":
-                            avg_vol = avg_vol_dict.get(sym, 0)
-                            if avg_vol > 0 and vol > vol_multiplier * avg_vol:
-                                passes_filter = True
-                        else:
-                            if val > min_value_inr * 1e7:
-                                passes_filter = True
-
-                        if passes_filter:
-                            # Add or update row in df_current_min
-                            df_current_min = df_current_min[df_current_min["symbol"] != sym]
-                            new_row = pd.DataFrame([trade_info])
-                            df_current_min = pd.concat([df_current_min, new_row], ignore_index=True)
+        async def consume_trades(queue):
+            # Process incoming trade messages for 1 minute intervals; latest passing trade per symbol
+            current_min = {}
+            last_minute = datetime.utcnow().minute
+
+            while True:
+                trades = []
+                try:
+                    # Time out so the minute still rolls over when no trades arrive
+                    trades.append(await asyncio.wait_for(queue.get(), timeout=1))
+                    while len(trades) < TRADE_BATCH_SIZE and not queue.empty():
+                        trades.append(queue.get_nowait())
+                except asyncio.TimeoutError:
+                    pass
+
+                if trades:
+                    volumes, values = process_trade_batch(trades, inr_rate)
+
+                    # Filtering logic
+                    if condition == "Volume-based":
+                        avg_vols = np.array([avg_vol_dict.get(trade['s'], 0) for trade in trades], dtype=np.float64)
+                        passes_filter = (avg_vols > 0) & (volumes > vol_multiplier * avg_vols)
+                    else:
+                        passes_filter = values > min_value_inr * 1e7
+
+                    # Only passing trades become rows; later trades overwrite earlier ones per symbol
+                    for i in np.flatnonzero(passes_filter):
+                        trade = trades[i]
+                        current_min[trade['s']] = {
+                            "symbol": trade['s'],
+                            "volume": float(volumes[i]),
+                            "value_in_inr": float(values[i]),
+                            "timestamp": datetime.fromtimestamp(trade['T'] / 1000),
+                        }
 
                 # Check if minute changed
                 now = datetime.utcnow()
                 if now.minute != last_minute:
                     last_minute = now.minute
+                    df_current_min = pd.DataFrame(list(current_min.values()), columns=["symbol", "volume", "value_in_inr", "timestamp"])
+                    current_min = {}
                     # Update session state filtered current
                     st.session_state.filtered_current = df_current_min.sort_values(by="timestamp", ascending=False)
                     # Append current to history
-                    st.session_state.filtered_history = pd.concat([df_current_min, st.session_state.filtered_history], ignore_index=True).drop_duplicates(subset=["symbol", "timestamp"]).sort_values(by="timestamp", ascending=False)
+                    st.session_state.history_chunks.append(df_current_min)
+                    if len(st.session_state.history_chunks) > HISTORY_MINUTES:
+                        st.session_state.history_chunks.pop(0)
 
-                    df_current_min = pd.DataFrame(columns=["symbol", "volume", "value_in_inr", "timestamp"])
                     # Show updated data
                     st.experimental_rerun()
-                time.sleep(1)
-            except Exception as e:
-                st.error(f"Error in main loop: {e}")
-                break
+
+        async def run_screener():
+            # Websocket producer and trade consumer share one event loop
+            queue = asyncio.Queue()
+            await asyncio.gather(listen_binance_ws(trade_streams, queue), consume_trades(queue))
+
+        try:
+            asyncio.run(run_screener())
+        except Exception as e:
+            st.error(f"Error in main loop: {e}")
 
 # Show current filtered pairs
 st.subheader("Current 1-Minute Filtered Pairs")
 df_filtered_current = filter_and_search(st.session_state.filtered_current, search_symbol)
 df_filtered_current_paginated = paginate(df_filtered_current, st.session_state.page_num_current)
-st.dataframe(df_filtered_current_paginated.style.applymap(lambda v: "background-color: lightgreen", subset=pd.IndexSlice[:, ["symbol"]]))
+# Highlight the symbol column with a static CSS rule instead of a per-cell Styler map;
+# st.table renders HTML cells, which the CSS can reach (st.dataframe draws on a canvas)
+st.markdown("<style>[data-testid='stTable'] tbody td:first-of-type {background-color: lightgreen;}</style>", unsafe_allow_html=True)
+st.table(df_filtered_current_paginated)
 
 # Show history filtered pairs
 st.subheader("Previous Minutes Filtered Pairs (History)")
-df_filtered_history = filter_and_search(st.session_state.filtered_history, search_symbol)
+df_filtered_history = filter_and_search(build_history(), search_symbol)
 df_filtered_history_paginated = paginate(df_filtered_history, st.session_state.page_num_history)
 st.dataframe(df_filtered_history_paginated)